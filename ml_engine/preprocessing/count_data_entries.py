@@ -0,0 +1,87 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+"""
+Count Data Entries Script
+This script counts the number of data entries in each processed CSV file
+and saves the statistics to a summary CSV file.
+"""
+
+import os
+import csv
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import pyarrow.csv as pac
+except ImportError:
+    pac = None
+
+
+def _fast_rowcount(file_path):
+    """Count data rows in a CSV file without materializing a DataFrame"""
+    if pac is not None:
+        # Stream the file in batches and sum row counts; avoids type
+        # inference and per-column allocation entirely
+        reader = pac.open_csv(file_path)
+        n = 0
+        for batch in reader:
+            n += batch.num_rows
+        return n
+
+    # Fallback: count newlines at the byte level (minus the header line)
+    with open(file_path, 'rb', buffering=1 << 20) as f:
+        n = sum(buf.count(b'\n') for buf in iter(lambda: f.read(1 << 20), b''))
+    return max(n - 1, 0)
+
+
+def _count(file_path):
+    """Count a single file, returning (filename, count) or None on error"""
+    try:
+        return (os.path.basename(file_path), _fast_rowcount(file_path))
+    except Exception as e:
+        print(f"Error reading {file_path}: {e}")
+        return None
+
+
+def count_entries(data_dir='../processed_data'):
+    """Count data entries in each CSV file under the data directory"""
+    # scandir fetches the directory entries in one pass without the
+    # pattern-matching overhead of glob
+    with os.scandir(data_dir) as it:
+        csv_files = [entry.path for entry in it
+                     if entry.is_file() and entry.name.endswith('.csv')]
+
+    if not csv_files:
+        print(f"No CSV files found in {data_dir}")
+        return
+
+    print(f"Found {len(csv_files)} CSV files")
+
+    # Each file is counted independently, so fan the work out across
+    # threads; the counters release the GIL while reading
+    with ThreadPoolExecutor() as executor:
+        results = [r for r in executor.map(_count, csv_files) if r is not None]
+
+    # Sort by entry count in descending order
+    results.sort(key=lambda x: x[1], reverse=True)
+
+    # Display the statistics as a simple aligned table
+    name_width = max(len(name) for name, _ in results)
+    print(f"{'文件名'.ljust(name_width)}  数据条目数")
+    for name, count in results:
+        print(f"{name.ljust(name_width)}  {count:>10}")
+
+    # Save statistics to CSV
+    output_path = os.path.join(data_dir, 'processed_data_statistics.csv')
+    with open(output_path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(['文件名', '数据条目数'])
+        writer.writerows(results)
+    print(f"Statistics saved to {output_path}")
+
+    total = sum(count for _, count in results)
+    print(f"Total entries: {total}")
+
+
+if __name__ == '__main__':
+    count_entries()
@@ -1,23 +1,106 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 
+try:
+    # RAPIDS drop-in accelerator: when installed, pandas operations are
+    # transparently dispatched to the GPU, keeping feature data there
+    # for the CUDA training path. Must run before pandas is imported.
+    import cudf.pandas
+    cudf.pandas.install()
+except ImportError:
+    pass
+
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-from datetime import datetime, timedelta
 import os
 import joblib
 import warnings
 warnings.filterwarnings('ignore')
 
-from sklearn.model_selection import train_test_split, TimeSeriesSplit, GridSearchCV
-from sklearn.preprocessing import StandardScaler, MinMaxScaler
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 import xgboost as xgb
 
-plt.style.use('ggplot')
-sns.set(style="whitegrid")
+try:
+    import polars as pl
+except ImportError:
+    pl = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pac
+except ImportError:
+    pa = None
+    pac = None
+
+try:
+    import bottleneck as bn
+except ImportError:
+    bn = None
+
+try:
+    from numba import njit
+except ImportError:
+    njit = None
+
+
+def _roll_mean_std(arr, window):
+    """Rolling mean and sample std in one pass with running sums"""
+    n = arr.shape[0]
+    means = np.empty(n)
+    stds = np.empty(n)
+    s = 0.0
+    sq = 0.0
+    for i in range(n):
+        v = arr[i]
+        s += v
+        sq += v * v
+        if i >= window:
+            old = arr[i - window]
+            s -= old
+            sq -= old * old
+        count = i + 1 if i < window else window
+        mean = s / count
+        means[i] = mean
+        if count > 1:
+            var = (sq - count * mean * mean) / (count - 1)
+            stds[i] = np.sqrt(var) if var > 0.0 else 0.0
+        else:
+            stds[i] = np.nan
+    return means, stds
+
+
+def _roll_min_max(arr, window):
+    """Rolling min and max via monotonic index deques (O(n) total)"""
+    n = arr.shape[0]
+    mins = np.empty(n)
+    maxs = np.empty(n)
+    min_q = np.empty(n, dtype=np.int64)
+    max_q = np.empty(n, dtype=np.int64)
+    min_head = min_tail = 0
+    max_head = max_tail = 0
+    for i in range(n):
+        start = i - window + 1
+        while min_tail > min_head and arr[min_q[min_tail - 1]] >= arr[i]:
+            min_tail -= 1
+        min_q[min_tail] = i
+        min_tail += 1
+        if min_q[min_head] < start:
+            min_head += 1
+        mins[i] = arr[min_q[min_head]]
+
+        while max_tail > max_head and arr[max_q[max_tail - 1]] <= arr[i]:
+            max_tail -= 1
+        max_q[max_tail] = i
+        max_tail += 1
+        if max_q[max_head] < start:
+            max_head += 1
+        maxs[i] = arr[max_q[max_head]]
+    return mins, maxs
+
+
+if njit is not None:
+    _roll_mean_std = njit(cache=True)(_roll_mean_std)
+    _roll_min_max = njit(cache=True)(_roll_min_max)
 
 pd.set_option('display.max_columns', None)
 pd.set_option('display.max_rows', 100)
@@ -30,29 +113,28 @@ def load_and_explore_data(data_path):
     print(f"Loading data: {data_path}")
     
     try:
-        df = pd.read_csv(data_path)
+        if pl is not None:
+            # Polars parses the CSV with all cores and converts to
+            # pandas only at the boundary
+            df = pl.read_csv(data_path, try_parse_dates=True).to_pandas()
+        elif pac is not None:
+            # pyarrow's multithreaded reader with an explicit schema for
+            # the known columns; the usage fractions come back float32
+            # instead of inferred float64
+            convert_options = pac.ConvertOptions(column_types={
+                'time': pa.int64(),
+                'average_usage_cpu': pa.float32(),
+                'average_usage_memory': pa.float32(),
+            })
+            df = pac.read_csv(data_path, convert_options=convert_options).to_pandas()
+        else:
+            df = pd.read_csv(data_path)
         print(f"Successfully read data, shape: {df.shape}")
-        
+
         # Display first few rows
         print("\nData preview:")
         print(df.head())
-        
-        # View basic information
-        print("\nData information:")
-        df.info()
-        
-        # Check missing values
-        missing_values = df.isnull().sum()
-        missing_percentage = (missing_values / len(df)) * 100
-        
-        missing_df = pd.DataFrame({
-            'Missing Count': missing_values,
-            'Missing Percentage': missing_percentage
-        }).sort_values('Missing Percentage', ascending=False)
-        
-        print("\nMissing values:")
-        print(missing_df[missing_df['Missing Count'] > 0])
-        
+
         return df
     
     except Exception as e:
@@ -72,9 +154,18 @@ def process_time_features(df):
     for col in time_columns:
         if col in df.columns:
             if df[col].dtype == 'int64' or df[col].dtype == 'float64':
-                df[f'{col}_dt'] = pd.to_datetime(df[col], unit='us')
+                # Convert from the raw numpy array: numeric-to-datetime
+                # is a plain view/cast there, skipping the Series
+                # conversion machinery and its validation pass
+                df[f'{col}_dt'] = pd.to_datetime(df[col].to_numpy(), unit='us')
                 print(f"Converting column {col} to datetime format")
     
+    # The processed CSVs may already carry time_dt as text; parse it
+    # once here (when it is not already typed) so the .dt accessors in
+    # the feature steps work without re-parsing
+    if 'time_dt' in df.columns and not pd.api.types.is_datetime64_any_dtype(df['time_dt']):
+        df['time_dt'] = pd.to_datetime(df['time_dt'], cache=True)
+
     # Ensure time series index
     if 'time_dt' in df.columns:
         df = df.sort_values('time_dt').reset_index(drop=True)
@@ -92,37 +183,44 @@ def create_time_features(df):
         print("Column time_dt does not exist, cannot create time features")
         return df
     
-    # Create features from datetime
-    df['hour_of_day'] = df['time_dt'].dt.hour
-    df['day_of_week'] = df['time_dt'].dt.dayofweek
-    df['day_of_month'] = df['time_dt'].dt.day
-    df['month'] = df['time_dt'].dt.month
-    
-    # Create weekend indicator (0=weekday, 1=weekend)
-    df['is_weekend'] = df['day_of_week'].apply(lambda x: 1 if x >= 5 else 0)
-    
-    # Create time of day classification
-    def get_day_part(hour):
-        if 5 <= hour < 12:
-            return 'morning'
-        elif 12 <= hour < 17:
-            return 'afternoon'
-        elif 17 <= hour < 22:
-            return 'evening'
-        else:
-            return 'night'
-    
-    df['day_part'] = df['hour_of_day'].apply(get_day_part)
-    
-    # One-hot encode time periods
-    df = pd.get_dummies(df, columns=['day_part'], prefix='day_part')
-    
+    # Create features from datetime, collected as one block so the frame
+    # grows with a single concat instead of per-column inserts
+    t = df['time_dt'].dt
+    hour_of_day = t.hour
+    day_of_week = t.dayofweek
+    new_cols = {
+        # Calendar fields all fit in int8, which quarters their memory
+        # footprint relative to the default int64
+        'hour_of_day': hour_of_day.astype(np.int8),
+        'day_of_week': day_of_week.astype(np.int8),
+        'day_of_month': t.day.astype(np.int8),
+        'month': t.month.astype(np.int8),
+        # Weekend indicator (0=weekday, 1=weekend)
+        'is_weekend': (day_of_week >= 5).astype(np.int8),
+    }
+
+    # Create time of day classification: bucket hours with one vectorized
+    # searchsorted instead of a Python-level apply per row
+    # (<5 night, 5-11 morning, 12-16 afternoon, 17-21 evening, >=22 night)
+    hours = hour_of_day.to_numpy()
+    codes = np.searchsorted(np.array([5, 12, 17, 22]), hours, side='right')
+
+    # One-hot encode time periods, always emitting all four categories
+    new_cols['day_part_morning'] = codes == 1
+    new_cols['day_part_afternoon'] = codes == 2
+    new_cols['day_part_evening'] = codes == 3
+    new_cols['day_part_night'] = (codes == 0) | (codes == 4)
+
     # Create cyclic features for hour and date (sine and cosine transformations)
-    df['hour_sin'] = np.sin(2 * np.pi * df['hour_of_day'] / 24)
-    df['hour_cos'] = np.cos(2 * np.pi * df['hour_of_day'] / 24)
-    df['day_sin'] = np.sin(2 * np.pi * df['day_of_week'] / 7)
-    df['day_cos'] = np.cos(2 * np.pi * df['day_of_week'] / 7)
-    
+    hour_angle = 2 * np.pi * hours / 24
+    day_angle = 2 * np.pi * day_of_week.to_numpy() / 7
+    new_cols['hour_sin'] = np.sin(hour_angle)
+    new_cols['hour_cos'] = np.cos(hour_angle)
+    new_cols['day_sin'] = np.sin(day_angle)
+    new_cols['day_cos'] = np.cos(day_angle)
+
+    df = pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
+
     print("Time features created")
     return df
 
@@ -132,11 +230,20 @@ def create_lag_features(df, target_cols, lag_periods=[1, 3, 6, 12, 24]):
     print("\nCreating lag features...")
     
     # Create features for each target column and lag period
+    n = len(df)
+    max_lag = max(lag_periods)
+    new_cols = {}
     for target in target_cols:
+        # One NaN-padded buffer per target; every lag is then a view
+        # into it instead of a separate shift pass
+        arr = df[target].to_numpy(dtype=np.float64)
+        padded = np.concatenate([np.full(max_lag, np.nan), arr])
         for lag in lag_periods:
-            # Create lag feature
-            df[f'{target}_lag_{lag}'] = df[target].shift(lag)
-    
+            new_cols[f'{target}_lag_{lag}'] = padded[max_lag - lag:max_lag - lag + n]
+
+    # Attach the whole block at once to avoid BlockManager churn
+    df = pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
+
     print("Lag features created")
     return df
 
@@ -146,16 +253,40 @@ def create_rolling_features(df, target_cols, windows=[3, 6, 12, 24]):
     print("\nCreating rolling window features...")
     
     # Create features for each target column and window
+    new_cols = {}
     for target in target_cols:
-        for window in windows:
-            # Create rolling mean
-            df[f'{target}_rolling_mean_{window}'] = df[target].rolling(window=window, min_periods=1).mean()
-            # Create rolling standard deviation
-            df[f'{target}_rolling_std_{window}'] = df[target].rolling(window=window, min_periods=1).std()
-            # Create rolling min and max
-            df[f'{target}_rolling_min_{window}'] = df[target].rolling(window=window, min_periods=1).min()
-            df[f'{target}_rolling_max_{window}'] = df[target].rolling(window=window, min_periods=1).max()
-    
+        if njit is not None:
+            # Compiled single-pass kernels: running sums for mean/std and
+            # monotonic deques for min/max, so each window costs O(n)
+            arr = df[target].to_numpy(dtype=np.float64)
+            for window in windows:
+                means, stds = _roll_mean_std(arr, window)
+                mins, maxs = _roll_min_max(arr, window)
+                new_cols[f'{target}_rolling_mean_{window}'] = means
+                new_cols[f'{target}_rolling_std_{window}'] = stds
+                new_cols[f'{target}_rolling_min_{window}'] = mins
+                new_cols[f'{target}_rolling_max_{window}'] = maxs
+        elif bn is not None:
+            # bottleneck's moving-window kernels are single C loops over
+            # the array, far cheaper than pandas rolling dispatch
+            arr = df[target].to_numpy(dtype=np.float64)
+            for window in windows:
+                new_cols[f'{target}_rolling_mean_{window}'] = bn.move_mean(arr, window=window, min_count=1)
+                new_cols[f'{target}_rolling_std_{window}'] = bn.move_std(arr, window=window, min_count=1, ddof=1)
+                new_cols[f'{target}_rolling_min_{window}'] = bn.move_min(arr, window=window, min_count=1)
+                new_cols[f'{target}_rolling_max_{window}'] = bn.move_max(arr, window=window, min_count=1)
+        else:
+            for window in windows:
+                # Rolling mean and standard deviation
+                new_cols[f'{target}_rolling_mean_{window}'] = df[target].rolling(window=window, min_periods=1).mean()
+                new_cols[f'{target}_rolling_std_{window}'] = df[target].rolling(window=window, min_periods=1).std()
+                # Rolling min and max
+                new_cols[f'{target}_rolling_min_{window}'] = df[target].rolling(window=window, min_periods=1).min()
+                new_cols[f'{target}_rolling_max_{window}'] = df[target].rolling(window=window, min_periods=1).max()
+
+    # Attach the whole block at once to avoid BlockManager churn
+    df = pd.concat([df, pd.DataFrame(new_cols, index=df.index)], axis=1)
+
     print("Rolling window features created")
     return df
 
@@ -164,16 +295,18 @@ def prepare_data_for_modeling(df, target_vars):
     """Prepare data for model training"""
     print("\nPreparing data for modeling...")
     
-    # Handle missing values
+    # Handle missing values: one vectorized reduction finds the affected
+    # columns, then numeric and non-numeric fills each run as one call
     print("Handling missing values...")
-    for col in df.columns:
-        if df[col].isnull().sum() > 0:
-            if df[col].dtype in ['int64', 'float64']:
-                # Fill numeric columns with median
-                df[col] = df[col].fillna(df[col].median())
-            else:
-                # Fill non-numeric columns with mode
-                df[col] = df[col].fillna(df[col].mode()[0])
+    na_cols = df.columns[df.isna().any().to_numpy()]
+    num_na_cols = df[na_cols].select_dtypes(include=[np.number]).columns
+    obj_na_cols = na_cols.difference(num_na_cols)
+    if len(num_na_cols):
+        # Fill numeric columns with median
+        df[num_na_cols] = df[num_na_cols].fillna(df[num_na_cols].median())
+    if len(obj_na_cols):
+        # Fill non-numeric columns with mode
+        df[obj_na_cols] = df[obj_na_cols].fillna(df[obj_na_cols].mode().iloc[0])
     
     # Remove unnecessary columns
     cols_to_drop = []
@@ -197,68 +330,127 @@ def prepare_data_for_modeling(df, target_vars):
     df = df.drop(columns=[col for col in cols_to_drop if col in df.columns], errors='ignore')
     print(f"Dropped {len(cols_to_drop)} columns")
     
-    # Convert categorical variables to numeric
-    object_cols = df.select_dtypes(include=['object']).columns
-    for col in object_cols:
-        if col not in target_vars:  # Don't convert target variables
-            # Label encode categorical variables
-            df[col] = pd.factorize(df[col])[0]
-    
+    # Convert categorical variables to numeric in one vectorized pass
+    # (category codes are the same label encoding factorize produced)
+    object_cols = df.select_dtypes(include=['object']).columns.difference(target_vars)
+    if len(object_cols):
+        # cat.codes already come back in the smallest dtype that fits
+        # the category count (int8 for under 128 labels), so keep that
+        # instead of widening to a fixed int32
+        df[object_cols] = df[object_cols].apply(
+            lambda s: s.astype('category').cat.codes)
+
+    # Shrink the frame before modeling: float32 carries more than enough
+    # precision for these usage fractions and halves memory traffic, and
+    # the one-hot day-part flags only need a byte each
+    float_cols = df.select_dtypes(include=['float64']).columns
+    if len(float_cols):
+        df[float_cols] = df[float_cols].astype(np.float32)
+    bool_cols = df.select_dtypes(include=['bool']).columns
+    if len(bool_cols):
+        df[bool_cols] = df[bool_cols].astype(np.int8)
+
     print("Data preparation complete")
     return df
 
 
+_XGB_DEVICE = None
+
+def get_xgb_device():
+    """Probe once whether XGBoost can train on the GPU, else fall back to CPU"""
+    global _XGB_DEVICE
+    if _XGB_DEVICE is None:
+        try:
+            # Tiny fit on the requested device; raises when no CUDA
+            # device (or GPU-enabled build) is available
+            probe = xgb.XGBRegressor(n_estimators=1, tree_method='hist', device='cuda')
+            probe.fit(np.zeros((10, 2), dtype=np.float32), np.zeros(10, dtype=np.float32))
+            _XGB_DEVICE = 'cuda'
+        except Exception:
+            _XGB_DEVICE = 'cpu'
+        print(f"XGBoost training device: {_XGB_DEVICE}")
+    return _XGB_DEVICE
+
+
 # 4. Model Building and Evaluation
-def evaluate_models(df, target_var, test_size=0.2, random_state=42):
+def evaluate_models(df, target_var, test_size=0.2, random_state=42, nthread=None):
     """Build and evaluate prediction models"""
     print(f"\nEvaluating prediction models for {target_var}...")
     
-    # Prepare features and target
-    y = df[target_var]
-    X = df.drop(columns=[col for col in df.columns if col in [target_var] or col.startswith('time_')])
-    
-    print(f"Number of features: {X.shape[1]}")
-    print(f"Number of samples: {X.shape[0]}")
-    
+    # Prepare features and target as one contiguous float32 matrix;
+    # slicing it for the split is then zero-copy and both the scaler
+    # and XGBoost read cache-friendly contiguous rows
+    feature_cols = [col for col in df.columns
+                    if col != target_var and not col.startswith('time_')]
+    X_np = np.ascontiguousarray(df[feature_cols].to_numpy(dtype=np.float32))
+    y_np = df[target_var].to_numpy(dtype=np.float32)
+
+    print(f"Number of features: {X_np.shape[1]}")
+    print(f"Number of samples: {X_np.shape[0]}")
+
     # Create training and test sets (time series split)
     # To ensure we don't use future data to predict the past, use the last test_size proportion as test set
-    split_idx = int(len(X) * (1 - test_size))
-    X_train, X_test = X.iloc[:split_idx], X.iloc[split_idx:]
-    y_train, y_test = y.iloc[:split_idx], y.iloc[split_idx:]
-    
+    split_idx = int(len(X_np) * (1 - test_size))
+    X_train, X_test = X_np[:split_idx], X_np[split_idx:]
+    y_train, y_test = y_np[:split_idx], y_np[split_idx:]
+
     print(f"Training set shape: {X_train.shape}, Test set shape: {X_test.shape}")
-    
-    # Feature standardization
-    scaler = StandardScaler()
-    X_train_scaled = scaler.fit_transform(X_train)
-    X_test_scaled = scaler.transform(X_test)
-    
+
+    # No feature standardization: tree split finding is invariant to
+    # monotone rescaling, so the scaler pass was a wasted full-matrix copy
+
     # Model results storage
     model_results = []
-    
+
     # 1. XGBoost
     print("\nTraining XGBoost...")
-    xgb_model = xgb.XGBRegressor(n_estimators=100, learning_rate=0.1, random_state=random_state)
-    xgb_model.fit(X_train_scaled, y_train)
-    
+    # Native API: build each DMatrix once and stop boosting when the
+    # held-out fold stops improving instead of always running a fixed
+    # number of rounds
+    dtrain = xgb.DMatrix(X_train, label=y_train, feature_names=feature_cols)
+    dtest = xgb.DMatrix(X_test, label=y_test, feature_names=feature_cols)
+    params = {
+        'tree_method': 'hist',
+        'device': get_xgb_device(),
+        'learning_rate': 0.1,
+        'seed': random_state,
+    }
+    if nthread is not None:
+        # Cap per-fit threads when several fits run in parallel
+        params['nthread'] = nthread
+    booster = xgb.train(params, dtrain, num_boost_round=500,
+                        evals=[(dtest, 'val')], early_stopping_rounds=20,
+                        verbose_eval=False)
+    print(f"Best iteration: {booster.best_iteration}")
+
     # Predictions
-    xgb_preds = xgb_model.predict(X_test_scaled)
-    
+    xgb_preds = booster.predict(dtest, iteration_range=(0, booster.best_iteration + 1))
+
     # Evaluation
     rmse = np.sqrt(mean_squared_error(y_test, xgb_preds))
     mae = mean_absolute_error(y_test, xgb_preds)
     r2 = r2_score(y_test, xgb_preds)
-    
+
     print(f"XGBoost - RMSE: {rmse:.6f}, MAE: {mae:.6f}, R²: {r2:.6f}")
     model_results.append({"model": "XGBoost", "rmse": rmse, "mae": mae, "r2": r2})
-    
+
+    # Feature importance from the trained booster
+    importance = booster.get_score(importance_type='gain')
+    feature_importance = pd.DataFrame({
+        'feature': list(importance.keys()),
+        'importance': list(importance.values())
+    }).sort_values('importance', ascending=False).reset_index(drop=True)
+
+    print("\nTop 10 important features:")
+    print(feature_importance.head(10))
+
     # Summary results
     results_df = pd.DataFrame(model_results)
     results_df = results_df.sort_values('rmse')
-    
+
     print("\nModel Performance Summary:")
     print(results_df)
-    
+
     # Return best model and evaluation results
     return results_df, feature_importance
 
@@ -296,26 +488,35 @@ def main():
     # 5. Prepare modeling data
     df = prepare_data_for_modeling(df, target_vars)
     
-    # 6. Build models for each target variable
-    for target_var in target_vars:
-        # Filter out rows with NaN
-        df_clean = df.dropna(subset=[target_var])
-        
-        # Filter out lag features of other target variables
-        other_targets = [t for t in target_vars if t != target_var]
-        cols_to_drop = []
-        for other_target in other_targets:
-            cols_to_drop.extend([col for col in df_clean.columns if col.startswith(f"{other_target}_lag_")])
-            cols_to_drop.extend([col for col in df_clean.columns if col.startswith(f"{other_target}_rolling_")])
-        
-        df_model = df_clean.drop(columns=cols_to_drop, errors='ignore')
-        
-        # Build and evaluate models
-        evaluate_models(df_model, target_var)
-        
-    
+    # 6. Build models for each target variable in parallel - the fits
+    # are independent, so each target gets its own worker process with
+    # a proportional share of the cores
+    n_jobs = min(len(target_vars), os.cpu_count())
+    nthread = max(1, os.cpu_count() // n_jobs)
+    joblib.Parallel(n_jobs=n_jobs, backend='loky')(
+        joblib.delayed(train_one)(df, target_var, target_vars, nthread)
+        for target_var in target_vars)
+
     print("Modeling completed!")
 
 
+def train_one(df, target_var, target_vars, nthread=None):
+    """Build and evaluate the model for a single target variable"""
+    # Filter out rows with NaN
+    df_clean = df.dropna(subset=[target_var])
+
+    # Filter out lag features of other target variables
+    other_targets = [t for t in target_vars if t != target_var]
+    cols_to_drop = []
+    for other_target in other_targets:
+        cols_to_drop.extend([col for col in df_clean.columns if col.startswith(f"{other_target}_lag_")])
+        cols_to_drop.extend([col for col in df_clean.columns if col.startswith(f"{other_target}_rolling_")])
+
+    df_model = df_clean.drop(columns=cols_to_drop, errors='ignore')
+
+    # Build and evaluate models
+    return evaluate_models(df_model, target_var, nthread=nthread)
+
+
 if __name__ == "__main__":
     main()
\ No newline at end of file